@@ -3,18 +3,31 @@ Truth Chain Backend - FastAPI Application
 Provides document hashing, verification, and Solana blockchain interaction.
 """
 
-from fastapi import FastAPI, File, UploadFile, HTTPException, Query
+from fastapi import FastAPI, File, UploadFile, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
 from typing import Optional, List
 from pydantic import BaseModel
 from datetime import datetime
+from functools import lru_cache
+import time
+import asyncio
+import logging
+import aiofiles
+import aiofiles.os
+import aiofiles.tempfile
 import uvicorn
 
-from services.hasher import compute_sha256, compute_sha256_bytes
-from services.solana_client import SolanaClient
+from services.hasher import (
+    compute_sha256,
+    compute_sha256_stream,
+    compute_hashes_stream,
+    UPLOAD_CHUNK_SIZE
+)
+from services.solana_client import SolanaClient, is_valid_cursor
 from services.ocr import OCRService
 from services.ai_analyzer import AIAnalyzer
+from services.cache import TTLCache
 from models.document import (
     DocumentMetadata,
     VerificationResult,
@@ -23,13 +36,16 @@ from models.document import (
     DocumentRegistration
 )
 
+logger = logging.getLogger(__name__)
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Truth Chain API",
     description="Immutable document verification system for the 2026 Epstein file releases",
     version="0.1.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse
 )
 
 # CORS configuration
@@ -46,15 +62,95 @@ solana_client = SolanaClient()
 ocr_service = OCRService()
 ai_analyzer = AIAnalyzer()
 
+# OCR + analysis results keyed by document content key (deterministic per PDF)
+ANALYSIS_CACHE_SIZE = 1024
+analysis_cache = TTLCache(maxsize=ANALYSIS_CACHE_SIZE)
+
+# Upper bound on files accepted by /api/hash_batch
+MAX_BATCH_FILES = 100
+
+background_tasks: List[asyncio.Task] = []
+
+
+@lru_cache(maxsize=1)
+def _iso_timestamp(epoch_second: int) -> str:
+    return datetime.utcfromtimestamp(epoch_second).isoformat()
+
+
+def utc_timestamp() -> str:
+    """Current UTC time in ISO format, formatted at most once per second."""
+    return _iso_timestamp(int(time.time()))
+
+
+async def spool_upload_to_disk(file: UploadFile) -> str:
+    """
+    Copy an upload to a named temporary PDF in chunks and return its path.
+    The caller is responsible for removing the file.
+    """
+    await file.seek(0)
+    path = None
+    try:
+        async with aiofiles.tempfile.NamedTemporaryFile("wb", suffix=".pdf", delete=False) as spool:
+            path = spool.name
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                await spool.write(chunk)
+    except BaseException:
+        # The caller never gets the path on failure, so the partial file is removed here
+        if path is not None:
+            await aiofiles.os.remove(path)
+        raise
+    return path
+
+
+def model_response(model: BaseModel) -> Response:
+    """
+    Serialize a response model straight to JSON.
+    Skips FastAPI's dump-then-revalidate round trip for models we built ourselves.
+    """
+    return Response(content=model.model_dump_json(), media_type="application/json")
+
+
+# ==============================================================================
+# LIFECYCLE
+# ==============================================================================
+
+@app.on_event("startup")
+async def startup():
+    """Load the Solana program and start background maintenance tasks."""
+    try:
+        await solana_client.warm_up()
+    except Exception:
+        # Leave it to the first request to retry
+        logger.warning("Solana program warm-up failed", exc_info=True)
+    background_tasks.append(asyncio.create_task(solana_client.watch_registry()))
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Stop background tasks and release worker pools and connections held by the services."""
+    for task in background_tasks:
+        task.cancel()
+    ocr_service.shutdown()
+    await solana_client.close()
+    await ai_analyzer.close()
+
 
 # ==============================================================================
 # HEALTH CHECK
 # ==============================================================================
 
-@app.get("/health")
-async def health_check():
+# Probe body is constant, so it is encoded once
+_HEALTH_BODY = b'{"status":"healthy"}'
+
+
+async def health_check(request: Request) -> Response:
     """Health check endpoint"""
-    return {"status": "healthy", "timestamp": datetime.utcnow().isoformat()}
+    return Response(content=_HEALTH_BODY, media_type="application/json")
+
+
+# Plain Starlette route: load balancer probes skip FastAPI's request parsing
+# and response serialization
+app.add_route("/health", health_check, methods=["GET"], include_in_schema=False)
 
 
 # ==============================================================================
@@ -71,19 +167,47 @@ async def hash_document(file: UploadFile = File(...)):
         raise HTTPException(status_code=400, detail="Only PDF files are accepted")
     
     try:
-        content = await file.read()
-        hash_hex = compute_sha256_bytes(content)
+        _, hash_hex, size_bytes = await compute_sha256_stream(file)
         
         return {
             "filename": file.filename,
             "hash": hash_hex,
-            "size_bytes": len(content),
-            "computed_at": datetime.utcnow().isoformat()
+            "size_bytes": size_bytes,
+            "computed_at": utc_timestamp()
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Hashing failed: {str(e)}")
 
 
+@app.post("/api/hash_batch", response_model=List[dict])
+async def hash_documents(files: List[UploadFile] = File(...)):
+    """
+    Generate SHA-256 hashes for multiple uploaded PDF documents.
+    Each file is streamed through the hasher (never buffered whole in memory);
+    files are hashed concurrently and results are returned in upload order.
+    """
+    if len(files) > MAX_BATCH_FILES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_FILES} files per batch")
+    if not all(f.filename.lower().endswith('.pdf') for f in files):
+        raise HTTPException(status_code=400, detail="Only PDF files are accepted")
+    
+    try:
+        results = await asyncio.gather(*(compute_sha256_stream(f) for f in files))
+        computed_at = utc_timestamp()
+        
+        return [
+            {
+                "filename": f.filename,
+                "hash": hash_hex,
+                "size_bytes": size,
+                "computed_at": computed_at
+            }
+            for f, (_, hash_hex, size) in zip(files, results)
+        ]
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Hashing failed: {str(e)}")
+
+
 # ==============================================================================
 # DOCUMENT VERIFICATION
 # ==============================================================================
@@ -98,39 +222,37 @@ async def verify_document(file: UploadFile = File(...)):
         raise HTTPException(status_code=400, detail="Only PDF files are accepted")
     
     try:
-        content = await file.read()
-        hash_hex = compute_sha256_bytes(content)
-        hash_bytes = bytes.fromhex(hash_hex)
+        hash_bytes, hash_hex, _ = await compute_sha256_stream(file)
         
         # Query Solana for this hash
         document_record = await solana_client.get_document_by_hash(hash_bytes)
         
         if document_record is None:
-            return VerificationResult(
+            return model_response(VerificationResult(
                 verified=False,
                 hash=hash_hex,
                 message="Document not found in Truth Chain registry",
                 document=None,
                 solscan_url=None
-            )
+            ))
         
         # Check if document was modified (stealth redaction)
         if document_record.is_modified:
-            return VerificationResult(
+            return model_response(VerificationResult(
                 verified=True,
                 hash=hash_hex,
                 message="⚠️ Document found but has been flagged as MODIFIED (stealth redaction detected)",
                 document=document_record,
                 solscan_url=solana_client.get_solscan_url(document_record.account_pubkey)
-            )
+            ))
         
-        return VerificationResult(
+        return model_response(VerificationResult(
             verified=True,
             hash=hash_hex,
             message="✓ Document verified - matches original DOJ release",
             document=document_record,
             solscan_url=solana_client.get_solscan_url(document_record.account_pubkey)
-        )
+        ))
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Verification failed: {str(e)}")
@@ -145,27 +267,34 @@ async def list_documents(
     page: int = Query(1, ge=1),
     limit: int = Query(20, ge=1, le=100),
     document_type: Optional[str] = None,
-    search: Optional[str] = None
+    search: Optional[str] = None,
+    cursor: Optional[str] = None
 ):
     """
     List registered documents with pagination and filtering.
     Supports filtering by document type and text search.
+    Pass the previous response's next_cursor to fetch the following page.
     """
+    if cursor is not None and not is_valid_cursor(cursor):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    
     try:
         documents = await solana_client.search_documents(
             page=page,
             limit=limit,
             document_type=document_type,
-            search_query=search
+            search_query=search,
+            cursor=cursor
         )
         
-        return DocumentSearchResult(
+        return model_response(DocumentSearchResult(
             documents=documents.items,
             total=documents.total,
             page=page,
             limit=limit,
-            has_more=documents.total > page * limit
-        )
+            has_more=documents.next_cursor is not None,
+            next_cursor=documents.next_cursor
+        ))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
 
@@ -182,7 +311,7 @@ async def get_document(hash_hex: str):
         if document is None:
             raise HTTPException(status_code=404, detail="Document not found")
         
-        return document
+        return model_response(document)
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid hash format")
     except HTTPException:
@@ -207,7 +336,7 @@ async def get_cats_record(cats_id: str):
         if record is None:
             raise HTTPException(status_code=404, detail="CATS record not found")
         
-        return record
+        return model_response(record)
     except HTTPException:
         raise
     except Exception as e:
@@ -283,25 +412,39 @@ async def process_document(file: UploadFile = File(...)):
         raise HTTPException(status_code=400, detail="Only PDF files are accepted")
     
     try:
-        content = await file.read()
+        # Compute the on-chain hash and the (faster) cache key in one pass
+        hash_hex, content_key = await compute_hashes_stream(file)
         
-        # Compute hash
-        hash_hex = compute_sha256_bytes(content)
-        
-        # Run OCR
-        extracted_text = await ocr_service.extract_text(content)
-        
-        # AI analysis for classification
-        analysis = await ai_analyzer.analyze_document(extracted_text)
+        # Same PDF bytes always produce the same analysis
+        result = analysis_cache.get(content_key)
+        if result is None:
+            # OCR workers read the document from disk rather than from a copy in RAM
+            pdf_path = await spool_upload_to_disk(file)
+            try:
+                # Run OCR
+                extracted_text = await ocr_service.extract_text(pdf_path)
+            finally:
+                await aiofiles.os.remove(pdf_path)
+            
+            # AI analysis for classification
+            analysis = await ai_analyzer.analyze_document(extracted_text)
+            
+            result = {
+                "extracted_text_preview": extracted_text[:500] + "..." if len(extracted_text) > 500 else extracted_text,
+                "document_type": analysis.document_type,
+                "cats_numbers": analysis.cats_numbers,
+                "entities": analysis.entities,
+                "suggested_title": analysis.suggested_title
+            }
+            
+            # Don't pin OCR failures or degraded (Claude-unavailable) analyses in the cache
+            if not extracted_text.startswith("[OCR") and not analysis.is_fallback:
+                analysis_cache.set(content_key, result)
         
         return {
             "hash": hash_hex,
             "filename": file.filename,
-            "extracted_text_preview": extracted_text[:500] + "..." if len(extracted_text) > 500 else extracted_text,
-            "document_type": analysis.document_type,
-            "cats_numbers": analysis.cats_numbers,
-            "entities": analysis.entities,
-            "suggested_title": analysis.suggested_title
+            **result
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Processing failed: {str(e)}")
@@ -350,7 +493,7 @@ async def get_stats():
     Get overall Truth Chain statistics.
     """
     try:
-        stats = await solana_client.get_registry_stats()
+        stats = await solana_client.get_full_stats()
         return {
             "total_documents": stats.document_count,
             "modified_count": stats.modified_count,
@@ -361,5 +504,17 @@ async def get_stats():
         raise HTTPException(status_code=500, detail=f"Stats fetch failed: {str(e)}")
 
 
+@app.get("/api/stats/count")
+async def get_stats_count():
+    """
+    Get the total number of registered documents.
+    Cheaper than /api/stats: reads only the on-chain registry counter.
+    """
+    try:
+        return {"total_documents": await solana_client.get_registry_count()}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Stats fetch failed: {str(e)}")
+
+
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
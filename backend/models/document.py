@@ -7,6 +7,24 @@ from typing import Optional, List
 from datetime import datetime
 
 
+# Known document types in the Epstein files
+DOCUMENT_TYPES = [
+    "FD-302",           # FBI Interview Report
+    "FD-1057",          # FBI Evidence Receipt
+    "Flight Log",       # Aircraft passenger manifest
+    "Deposition",       # Legal testimony
+    "Court Filing",     # Legal documents
+    "Financial Record", # Bank statements, transactions
+    "Email",            # Electronic correspondence
+    "Photograph",       # Image description
+    "Letter",           # Written correspondence
+    "Report",           # General investigative report
+    "Subpoena",         # Legal demand
+    "Contract",         # Legal agreement
+    "Unknown"           # Unclassified
+]
+
+
 class DocumentMetadata(BaseModel):
     """Document record from the blockchain."""
     hash: str
@@ -38,6 +56,7 @@ class DocumentSearchResult(BaseModel):
     page: int
     limit: int
     has_more: bool
+    next_cursor: Optional[str] = None
 
 
 class CATSRecord(BaseModel):
@@ -5,15 +5,36 @@ Uses Claude API for document classification and CATS extraction.
 
 import os
 import re
-from typing import Optional, List
+import logging
+import hashlib
+from typing import Optional, List, Set
 from dataclasses import dataclass
 
 try:
-    from anthropic import Anthropic
+    import httpx
+    from anthropic import AsyncAnthropic
     ANTHROPIC_AVAILABLE = True
 except ImportError:
     ANTHROPIC_AVAILABLE = False
-    print("Warning: Anthropic SDK not installed. Run: pip install anthropic")
+    logging.getLogger(__name__).warning("Anthropic SDK not installed. Run: pip install anthropic")
+
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+from services.cache import TTLCache
+from models.document import DOCUMENT_TYPES
+
+logger = logging.getLogger(__name__)
+
+# Claude analyses keyed by SHA-256 of the document text
+CLAUDE_CACHE_SIZE = 1024
+
+# Connection pool shared by all Claude requests
+CLAUDE_MAX_CONNECTIONS = 100
+CLAUDE_MAX_KEEPALIVE = 20
 
 
 @dataclass
@@ -24,28 +45,42 @@ class DocumentAnalysis:
     entities: List[str]
     suggested_title: str
     summary: Optional[str] = None
+    # Set when Claude was configured but failed and the rule-based result was used instead
+    is_fallback: bool = False
 
 
-# Known document types in the Epstein files
-DOCUMENT_TYPES = [
-    "FD-302",           # FBI Interview Report
-    "FD-1057",          # FBI Evidence Receipt
-    "Flight Log",       # Aircraft passenger manifest
-    "Deposition",       # Legal testimony
-    "Court Filing",     # Legal documents
-    "Financial Record", # Bank statements, transactions
-    "Email",            # Electronic correspondence
-    "Photograph",       # Image description
-    "Letter",           # Written correspondence
-    "Report",           # General investigative report
-    "Subpoena",         # Legal demand
-    "Contract",         # Legal agreement
-    "Unknown"           # Unclassified
-]
-
 # CATS number pattern
 CATS_PATTERN = r'CATS[-\s]?(?:\d{4}[-\s]?)?\d{4,}'
 
+# Precompiled patterns (avoid per-call regex cache lookups)
+_CATS_RE = re.compile(CATS_PATTERN, re.IGNORECASE)
+_NAME_RE = re.compile(r'\b[A-Z][a-z]+\s+[A-Z][a-z]+\b')
+_FIELD_RES = {
+    field: re.compile(f"{field}:\\s*(.+?)(?=\\n[A-Z_]+:|$)", re.DOTALL)
+    for field in ("DOCUMENT_TYPE", "ENTITIES", "TITLE", "SUMMARY")
+}
+
+# Keywords used by rule-based classification (matched against lowercased text)
+CLASSIFICATION_KEYWORDS = (
+    "fd-302", "interview of", "flight", "log", "manifest", "deposition",
+    "q.", "a.", "subpoena", "bank", "transaction", "@", "from:", "to:",
+    "court", "docket"
+)
+
+# Single-pass keyword scanner (one automaton walk instead of one scan per keyword)
+if AHOCORASICK_AVAILABLE:
+    _KEYWORD_AUTOMATON = ahocorasick.Automaton()
+    for _keyword in CLASSIFICATION_KEYWORDS:
+        _KEYWORD_AUTOMATON.add_word(_keyword, _keyword)
+    _KEYWORD_AUTOMATON.make_automaton()
+
+
+def _find_keywords(text_lower: str) -> Set[str]:
+    """Return the classification keywords present in the lowercased text."""
+    if AHOCORASICK_AVAILABLE:
+        return {keyword for _, keyword in _KEYWORD_AUTOMATON.iter(text_lower)}
+    return {keyword for keyword in CLASSIFICATION_KEYWORDS if keyword in text_lower}
+
 
 class AIAnalyzer:
     """Service for AI-powered document analysis using Claude."""
@@ -53,12 +88,29 @@ class AIAnalyzer:
     def __init__(self):
         """Initialize the AI analyzer with Claude API."""
         self.api_key = os.environ.get("ANTHROPIC_API_KEY")
+        self._claude_cache = TTLCache(maxsize=CLAUDE_CACHE_SIZE)
         
         if ANTHROPIC_AVAILABLE and self.api_key:
-            self.client = Anthropic(api_key=self.api_key)
+            # Async client so the Claude round trip doesn't block the event loop
+            self.client = AsyncAnthropic(
+                api_key=self.api_key,
+                http_client=httpx.AsyncClient(
+                    http2=True,
+                    limits=httpx.Limits(
+                        max_connections=CLAUDE_MAX_CONNECTIONS,
+                        max_keepalive_connections=CLAUDE_MAX_KEEPALIVE
+                    )
+                )
+            )
         else:
             self.client = None
     
+    async def close(self) -> None:
+        """Close the pooled Claude HTTP connections."""
+        if self.client is not None:
+            # Also closes the httpx client it was built on
+            await self.client.close()
+    
     async def analyze_document(self, text: str) -> DocumentAnalysis:
         """
         Analyze document text to classify type and extract metadata.
@@ -81,7 +133,7 @@ class AIAnalyzer:
     
     def _extract_cats_numbers(self, text: str) -> List[str]:
         """Extract CATS numbers using regex."""
-        matches = re.findall(CATS_PATTERN, text, re.IGNORECASE)
+        matches = _CATS_RE.findall(text)
         # Normalize format
         return [m.replace(' ', '-').upper() for m in matches]
     
@@ -90,31 +142,35 @@ class AIAnalyzer:
         Fallback rule-based document classification.
         """
         text_lower = text.lower()
+        found = _find_keywords(text_lower)
         
         # Detect document type based on keywords
         doc_type = "Unknown"
         
-        if "fd-302" in text_lower or "interview of" in text_lower:
+        if "fd-302" in found or "interview of" in found:
             doc_type = "FD-302"
-        elif "flight" in text_lower and ("log" in text_lower or "manifest" in text_lower):
+        elif "flight" in found and ("log" in found or "manifest" in found):
             doc_type = "Flight Log"
-        elif "deposition" in text_lower or "q." in text_lower and "a." in text_lower:
+        elif "deposition" in found or "q." in found and "a." in found:
             doc_type = "Deposition"
-        elif "subpoena" in text_lower:
+        elif "subpoena" in found:
             doc_type = "Subpoena"
-        elif "bank" in text_lower or "transaction" in text_lower:
+        elif "bank" in found or "transaction" in found:
             doc_type = "Financial Record"
-        elif "@" in text and ("from:" in text_lower or "to:" in text_lower):
+        elif "@" in found and ("from:" in found or "to:" in found):
             doc_type = "Email"
-        elif "court" in text_lower or "docket" in text_lower:
+        elif "court" in found or "docket" in found:
             doc_type = "Court Filing"
         
         # Extract potential entity names (simple heuristic)
         entities = self._extract_simple_entities(text)
         
-        # Generate title from first meaningful line
-        lines = [l.strip() for l in text.split('\n') if l.strip() and len(l.strip()) > 10]
-        suggested_title = lines[0][:128] if lines else "Untitled Document"
+        # Generate title from first meaningful line (stop at the first match)
+        first_line = next(
+            (line for line in map(str.strip, text.split('\n')) if len(line) > 10),
+            None
+        )
+        suggested_title = first_line[:128] if first_line else "Untitled Document"
         
         return DocumentAnalysis(
             document_type=doc_type,
@@ -126,8 +182,7 @@ class AIAnalyzer:
     def _extract_simple_entities(self, text: str) -> List[str]:
         """Extract potential entity names using simple patterns."""
         # Look for capitalized name patterns
-        name_pattern = r'\b[A-Z][a-z]+\s+[A-Z][a-z]+\b'
-        matches = re.findall(name_pattern, text)
+        matches = _NAME_RE.findall(text)
         
         # Deduplicate and limit
         unique_names = list(set(matches))[:20]
@@ -140,6 +195,11 @@ class AIAnalyzer:
         """
         Use Claude for intelligent document analysis.
         """
+        cache_key = hashlib.sha256(text.encode()).digest()
+        cached = self._claude_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
         # Truncate text if too long
         max_chars = 50000
         truncated = text[:max_chars] + "..." if len(text) > max_chars else text
@@ -167,7 +227,7 @@ SUMMARY: [summary]
 """
 
         try:
-            response = self.client.messages.create(
+            response = await self.client.messages.create(
                 model="claude-sonnet-4-20250514",
                 max_tokens=500,
                 messages=[{"role": "user", "content": prompt}]
@@ -183,20 +243,23 @@ SUMMARY: [summary]
             
             entities = [e.strip() for e in entities_str.split(',') if e.strip()]
             
-            return DocumentAnalysis(
+            analysis = DocumentAnalysis(
                 document_type=doc_type,
                 cats_numbers=cats_numbers,
                 entities=entities,
                 suggested_title=title,
                 summary=summary
             )
+            self._claude_cache.set(cache_key, analysis)
+            return analysis
         
-        except Exception as e:
-            print(f"Claude analysis error: {e}")
-            return self._rule_based_analysis(text, cats_numbers)
+        except Exception:
+            logger.warning("Claude analysis failed, using rule-based fallback", exc_info=True)
+            analysis = self._rule_based_analysis(text, cats_numbers)
+            analysis.is_fallback = True
+            return analysis
     
     def _parse_field(self, text: str, field: str) -> Optional[str]:
         """Parse a field from Claude's response."""
-        pattern = f"{field}:\\s*(.+?)(?=\\n[A-Z_]+:|$)"
-        match = re.search(pattern, text, re.DOTALL)
+        match = _FIELD_RES[field].search(text)
         return match.group(1).strip() if match else None
@@ -0,0 +1,50 @@
+"""
+Bloom Filter
+Probabilistic set membership for registered document accounts.
+"""
+
+import math
+from typing import Iterable, Iterator
+
+
+class BloomFilter:
+    """
+    Bloom filter over 32-byte keys (SHA-256 digests, Solana addresses).
+
+    Keys are already uniformly distributed, so bit positions are derived
+    directly from the key bytes (double hashing) instead of rehashing.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        """
+        Initialize an empty filter.
+
+        Args:
+            capacity: Expected number of keys
+            error_rate: Target false-positive rate at capacity
+        """
+        capacity = max(capacity, 1)
+        self.capacity = capacity
+        self.num_bits = max(64, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+
+    @classmethod
+    def from_keys(cls, keys: Iterable[bytes], capacity: int, error_rate: float = 0.001) -> "BloomFilter":
+        """Build a filter pre-populated with keys."""
+        bloom = cls(capacity, error_rate)
+        for key in keys:
+            bloom.add(key)
+        return bloom
+
+    def _positions(self, key: bytes) -> Iterator[int]:
+        h1 = int.from_bytes(key[:8], "little")
+        h2 = int.from_bytes(key[8:16], "little") | 1
+        return ((h1 + i * h2) % self.num_bits for i in range(self.num_hashes))
+
+    def add(self, key: bytes) -> None:
+        for pos in self._positions(key):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key: bytes) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
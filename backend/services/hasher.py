@@ -5,7 +5,22 @@ Provides consistent document hashing for verification.
 
 import hashlib
 from pathlib import Path
-from typing import Union
+from typing import Any, Tuple, Union
+
+try:
+    from blake3 import blake3
+    BLAKE3_AVAILABLE = True
+except ImportError:
+    BLAKE3_AVAILABLE = False
+
+
+# hashlib.sha256 is OpenSSL's implementation on CPython, which dispatches to
+# the CPU's SHA extensions (SHA-NI / ARMv8 SHA2) at runtime when present.
+_sha256_factory = hashlib.sha256
+
+# Larger reads amortize the per-call overhead of update()
+_FILE_CHUNK_SIZE = 1 << 20
+UPLOAD_CHUNK_SIZE = 1 << 20
 
 
 def compute_sha256(file_path: Union[str, Path]) -> str:
@@ -18,11 +33,11 @@ def compute_sha256(file_path: Union[str, Path]) -> str:
     Returns:
         Hex-encoded SHA-256 hash string
     """
-    sha256 = hashlib.sha256()
+    sha256 = _sha256_factory()
     
     with open(file_path, 'rb') as f:
         # Read in chunks for large files
-        for chunk in iter(lambda: f.read(8192), b''):
+        for chunk in iter(lambda: f.read(_FILE_CHUNK_SIZE), b''):
             sha256.update(chunk)
     
     return sha256.hexdigest()
@@ -38,9 +53,77 @@ def compute_sha256_bytes(content: bytes) -> str:
     Returns:
         Hex-encoded SHA-256 hash string
     """
-    sha256 = hashlib.sha256()
-    sha256.update(content)
-    return sha256.hexdigest()
+    return _sha256_factory(content).hexdigest()
+
+
+async def compute_sha256_stream(upload: Any, chunk_size: int = UPLOAD_CHUNK_SIZE) -> Tuple[bytes, str, int]:
+    """
+    Compute SHA-256 hash of an upload by streaming it in chunks.
+    
+    Only one chunk is resident at a time, so large PDFs never need to be
+    buffered in memory just to be hashed.
+    
+    Args:
+        upload: UploadFile (or any object with an async read(size) method)
+        chunk_size: Bytes to read per chunk
+        
+    Returns:
+        Tuple of (raw 32-byte digest, hex-encoded hash string, total size in bytes)
+    """
+    sha256 = _sha256_factory()
+    total = 0
+    
+    while chunk := await upload.read(chunk_size):
+        sha256.update(chunk)
+        total += len(chunk)
+    
+    digest = sha256.digest()
+    return digest, digest.hex(), total
+
+
+def compute_blake3_bytes(content: bytes) -> str:
+    """
+    Compute BLAKE3 hash of bytes content.
+    
+    Only for off-chain content addressing (cache keys); on-chain records
+    are always SHA-256. Falls back to SHA-256 if blake3 is not installed.
+    
+    Args:
+        content: Raw bytes to hash
+        
+    Returns:
+        Hex-encoded hash string
+    """
+    if not BLAKE3_AVAILABLE:
+        return compute_sha256_bytes(content)
+    return blake3(content, max_threads=blake3.AUTO).hexdigest()
+
+
+async def compute_hashes_stream(upload: Any, chunk_size: int = UPLOAD_CHUNK_SIZE) -> Tuple[str, str]:
+    """
+    Compute the SHA-256 hash and a content key of an upload in one streamed pass.
+    
+    The content key is BLAKE3 when available (SHA-256 otherwise) and is meant
+    for off-chain lookups such as the analysis cache.
+    
+    Args:
+        upload: UploadFile (or any object with an async read(size) method)
+        chunk_size: Bytes to read per chunk
+        
+    Returns:
+        Tuple of (hex-encoded SHA-256 hash string, hex-encoded content key)
+    """
+    sha256 = _sha256_factory()
+    content_hasher = blake3(max_threads=blake3.AUTO) if BLAKE3_AVAILABLE else None
+    
+    while chunk := await upload.read(chunk_size):
+        sha256.update(chunk)
+        if content_hasher is not None:
+            content_hasher.update(chunk)
+    
+    sha256_hex = sha256.hexdigest()
+    content_key = content_hasher.hexdigest() if content_hasher is not None else sha256_hex
+    return sha256_hex, content_key
 
 
 def hash_to_bytes(hash_hex: str) -> bytes:
@@ -4,17 +4,157 @@ Extracts text from PDF documents using Tesseract.
 """
 
 import io
+import os
+import logging
 import asyncio
-from typing import Optional
-from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Union
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
 try:
     import pytesseract
-    from pdf2image import convert_from_bytes
+    from pdf2image import convert_from_bytes, convert_from_path
+    from PIL import Image
     OCR_AVAILABLE = True
 except ImportError:
     OCR_AVAILABLE = False
-    print("Warning: OCR dependencies not installed. Run: pip install pytesseract pdf2image")
+    logging.getLogger(__name__).warning("OCR dependencies not installed. Run: pip install pytesseract pdf2image")
+
+try:
+    import pymupdf
+    PYMUPDF_AVAILABLE = True
+except ImportError:
+    PYMUPDF_AVAILABLE = False
+
+# Pages with less embedded text than this are treated as scanned and OCR'd
+MIN_TEXT_LAYER_CHARS = 50
+OCR_DPI = 300
+# Page threads per worker process; the pool gets cpu_count // this many
+# processes so a single large PDF can still spread across several cores
+OCR_PAGE_THREADS = 4
+
+# Page-level OCR pool, created lazily inside each worker process
+_page_executor: Optional[ThreadPoolExecutor] = None
+# Threads each worker may use for pages (set by _init_worker)
+_page_threads = 1
+
+
+def _text_from_ocr_data(data: dict) -> str:
+    """
+    Rebuild plain text from pytesseract.image_to_data output.
+    Words are joined into lines and lines into paragraphs by their layout ids.
+    """
+    paragraphs, lines, words = [], [], []
+    current_par = current_line = None
+    
+    for block, par, line, word in zip(data["block_num"], data["par_num"], data["line_num"], data["text"]):
+        if not word.strip():
+            continue
+        
+        if (block, par, line) != current_line:
+            if words:
+                lines.append(" ".join(words))
+                words = []
+            current_line = (block, par, line)
+        
+        if (block, par) != current_par:
+            if lines:
+                paragraphs.append("\n".join(lines))
+                lines = []
+            current_par = (block, par)
+        
+        words.append(word)
+    
+    if words:
+        lines.append(" ".join(words))
+    if lines:
+        paragraphs.append("\n".join(lines))
+    
+    return "\n\n".join(paragraphs)
+
+
+def _get_page_executor() -> ThreadPoolExecutor:
+    """Per-process thread pool for page-level OCR (Tesseract runs outside the GIL)."""
+    global _page_executor
+    if _page_executor is None:
+        _page_executor = ThreadPoolExecutor(max_workers=_page_threads)
+    return _page_executor
+
+
+def _init_worker(tesseract_cmd: Optional[str], page_threads: int) -> None:
+    """Process pool initializer: apply settings that don't survive the process boundary."""
+    global _page_threads
+    _page_threads = page_threads
+    if tesseract_cmd and OCR_AVAILABLE:
+        pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+
+
+def _extract_sync(source: Union[bytes, str]) -> str:
+    """
+    Synchronous text extraction (runs in the OCR process pool).
+    
+    Args:
+        source: Raw PDF bytes, or a path to a PDF on disk
+    """
+    if PYMUPDF_AVAILABLE:
+        return _extract_text_layer(source)
+    
+    if not OCR_AVAILABLE:
+        return "[OCR not available - install pytesseract and pdf2image]"
+    
+    try:
+        # Convert PDF pages to images
+        if isinstance(source, str):
+            images = convert_from_path(source, dpi=OCR_DPI, thread_count=_page_threads)
+        else:
+            images = convert_from_bytes(source, dpi=OCR_DPI, thread_count=_page_threads)
+        
+        # Extract text from each page in parallel
+        page_texts = _get_page_executor().map(pytesseract.image_to_string, images)
+        text_parts = [
+            f"--- Page {i + 1} ---\n{page_text}"
+            for i, page_text in enumerate(page_texts)
+        ]
+        
+        return "\n\n".join(text_parts)
+    except Exception as e:
+        return f"[OCR Error: {str(e)}]"
+
+
+def _extract_text_layer(source: Union[bytes, str]) -> str:
+    """
+    Read the embedded text layer, OCRing only pages that have none.
+    
+    Born-digital PDFs never get rasterized; scanned pages are rendered
+    individually and sent through Tesseract.
+    """
+    try:
+        doc = pymupdf.open(source) if isinstance(source, str) else pymupdf.open(stream=source, filetype="pdf")
+        with doc:
+            page_texts = [page.get_text("text") for page in doc]
+            scanned = [
+                i for i, page_text in enumerate(page_texts)
+                if len(page_text.strip()) < MIN_TEXT_LAYER_CHARS
+            ]
+            
+            if scanned and OCR_AVAILABLE:
+                images = [_render_page(doc[i]) for i in scanned]
+                ocr_texts = _get_page_executor().map(pytesseract.image_to_string, images)
+                for i, page_text in zip(scanned, ocr_texts):
+                    page_texts[i] = page_text
+        
+        return "\n\n".join(
+            f"--- Page {i + 1} ---\n{page_text}"
+            for i, page_text in enumerate(page_texts)
+        )
+    except Exception as e:
+        return f"[OCR Error: {str(e)}]"
+
+
+def _render_page(page) -> "Image.Image":
+    """Rasterize a single PyMuPDF page for Tesseract."""
+    pix = page.get_pixmap(dpi=OCR_DPI)
+    return Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
 
 
 class OCRService:
@@ -30,41 +170,44 @@ class OCRService:
         if tesseract_cmd and OCR_AVAILABLE:
             pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
         
-        self.executor = ThreadPoolExecutor(max_workers=4)
+        self.tesseract_cmd = tesseract_cmd
+        cores = os.cpu_count() or 4
+        # About one thread per core in total: few processes, several page threads each
+        self.page_threads = min(OCR_PAGE_THREADS, cores)
+        self.max_workers = max(1, cores // self.page_threads)
+        # Created on first use so importing the app never starts worker processes
+        self._executor: Optional[ProcessPoolExecutor] = None
     
-    def _extract_sync(self, pdf_bytes: bytes) -> str:
-        """
-        Synchronous text extraction (runs in thread pool).
-        """
-        if not OCR_AVAILABLE:
-            return "[OCR not available - install pytesseract and pdf2image]"
-        
-        try:
-            # Convert PDF pages to images
-            images = convert_from_bytes(pdf_bytes, dpi=300)
-            
-            # Extract text from each page
-            text_parts = []
-            for i, image in enumerate(images):
-                page_text = pytesseract.image_to_string(image)
-                text_parts.append(f"--- Page {i + 1} ---\n{page_text}")
-            
-            return "\n\n".join(text_parts)
-        except Exception as e:
-            return f"[OCR Error: {str(e)}]"
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("forkserver"),
+                initializer=_init_worker,
+                initargs=(self.tesseract_cmd, self.page_threads)
+            )
+        return self._executor
     
-    async def extract_text(self, pdf_bytes: bytes) -> str:
+    def shutdown(self) -> None:
+        """Stop the OCR worker processes, if any were started."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+    
+    async def extract_text(self, source: Union[bytes, str]) -> str:
         """
         Extract text from a PDF document asynchronously.
         
         Args:
-            pdf_bytes: Raw PDF file bytes
+            source: Raw PDF file bytes, or a path to a PDF on disk (preferred
+                for large files: workers read it directly instead of
+                receiving a copy of the bytes)
             
         Returns:
             Extracted text content
         """
-        loop = asyncio.get_event_loop()
-        text = await loop.run_in_executor(self.executor, self._extract_sync, pdf_bytes)
+        loop = asyncio.get_running_loop()
+        text = await loop.run_in_executor(self._get_executor(), _extract_sync, source)
         return text
     
     async def extract_text_with_layout(self, pdf_bytes: bytes) -> dict:
@@ -85,9 +228,9 @@ class OCRService:
             
             pages = []
             for i, image in enumerate(images):
-                # Get structured data
+                # Single OCR pass: plain text is rebuilt from the structured data
                 data = pytesseract.image_to_data(image, output_type=pytesseract.Output.DICT)
-                text = pytesseract.image_to_string(image)
+                text = _text_from_ocr_data(data)
                 
                 pages.append({
                     "page_number": i + 1,
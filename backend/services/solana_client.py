@@ -5,27 +5,106 @@ Handles all interactions with the Truth Chain Solana program on Devnet.
 
 import os
 import json
-from typing import Optional, List
+import logging
+import base64
+import struct
+import asyncio
+import bisect
+import time
+from collections import Counter, deque
+from functools import lru_cache
+from typing import Dict, Optional, List, Set, Tuple
 from dataclasses import dataclass
 from pathlib import Path
-from models.document import DocumentMetadata, CATSRecord
+import orjson
+from models.document import DocumentMetadata, CATSRecord, DOCUMENT_TYPES
+from services.cache import TTLCache, MISSING
+from services.bloom import BloomFilter
 
 # Core Solana Libraries
 try:
+    import httpx
     from solders.pubkey import Pubkey
     from solders.keypair import Keypair
+    from solders.system_program import ID as SYSTEM_PROGRAM_ID
     from solana.rpc.async_api import AsyncClient
+    from solana.rpc.commitment import Confirmed, Processed
+    from solana.rpc.types import DataSliceOpts, MemcmpOpts, TxOpts
+    from solana.rpc.websocket_api import connect as ws_connect
     from anchorpy import Program, Provider, Wallet, Idl
+    from anchorpy.error import AccountDoesNotExistError
     HAS_SOLANA = True
 except ImportError:
     HAS_SOLANA = False
 
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
 # Program ID (as deployed by user)
 PROGRAM_ID_STR = "7r98Fey4c7KijkFT2VtjrdTyYvpnrACN3XJgnQAd4Rnf"
 
 # RPC endpoints
 DEVNET_RPC = "https://api.devnet.solana.com"
 MAINNET_RPC = "https://api.mainnet-beta.solana.com"
+DEVNET_WS = "wss://api.devnet.solana.com"
+MAINNET_WS = "wss://api.mainnet-beta.solana.com"
+
+# HTTP connection pool shared by every RPC call this client makes
+RPC_TIMEOUT = 30
+RPC_MAX_CONNECTIONS = 100
+RPC_MAX_KEEPALIVE = 20
+RPC_KEEPALIVE_EXPIRY = 60
+
+# Local IDL locations, in lookup order (IDL_PATH overrides; the chain is the last resort)
+IDL_SEARCH_PATHS = [
+    Path(__file__).parent.parent / "idl" / "truth_chain.json",
+    Path(__file__).parent.parent.parent / "target" / "idl" / "truth_chain.json",
+]
+
+# Reads are display-only and can use the freshest (unconfirmed) bank;
+# transactions are still sent and awaited at "confirmed"
+READ_COMMITMENT = "processed"
+
+# Delay before re-opening a dropped programSubscribe stream
+WS_RECONNECT_SECONDS = 5
+
+# A failing read path logs its full traceback at most this often;
+# repeats in between are one-line warnings
+FAILURE_TRACEBACK_SECONDS = 60
+
+# Document lookup cache (misses expire sooner so new registrations show up quickly)
+DOCUMENT_CACHE_SIZE = 50_000
+DOCUMENT_CACHE_TTL = 300
+DOCUMENT_CACHE_NEGATIVE_TTL = 30
+
+# Memoized document PDA derivations (each one is a bump-seed search)
+PDA_CACHE_SIZE = 100_000
+
+# getMultipleAccounts accepts at most this many addresses per call
+MAX_MULTIPLE_ACCOUNTS = 100
+
+# DocumentRecord account layout (Borsh, see programs/truth_chain/src/lib.rs):
+# 8-byte discriminator, 32-byte hash, then the length-prefixed document_type.
+# Fields after document_type sit at variable offsets.
+DOCUMENT_RECORD_SIZE = 434
+DOCUMENT_TYPE_OFFSET = 40
+# Longest possible prefix holding hash, document_type (max 32) and cats_number (max 64)
+DOCUMENT_HEADER_LEN = DOCUMENT_TYPE_OFFSET + (4 + 32) + (1 + 4 + 64)
+
+# Full-data scans ask the node to compress account data when we can inflate it
+ACCOUNT_ENCODING = "base64+zstd" if ZSTD_AVAILABLE else "base64"
+
+_B58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+
+# Bloom filter of registered document accounts (short-circuits unknown hashes)
+BLOOM_ERROR_RATE = 0.001
+BLOOM_MIN_CAPACITY = 10_000
+BLOOM_RECENT_KEYS = 10_000
 
 @dataclass
 class TransactionResult:
@@ -36,6 +115,7 @@ class TransactionResult:
 class PaginatedResult:
     items: List[DocumentMetadata]
     total: int
+    next_cursor: Optional[str] = None
 
 @dataclass
 class RegistryStats:
@@ -44,20 +124,199 @@ class RegistryStats:
     unique_cats: int
     document_types: dict
 
+@dataclass(frozen=True)
+class RecordSummary:
+    """The DocumentRecord fields that registry stats and the CATS index are built from."""
+    hash: bytes
+    document_type: str
+    cats_number: Optional[str]
+    is_modified: bool
+
+    @classmethod
+    def from_account(cls, account, data: bytes) -> "RecordSummary":
+        # The hash is sliced from the raw account rather than rebuilt from the decoded int list
+        return cls(data[8:DOCUMENT_TYPE_OFFSET], account.document_type, account.cats_number, account.is_modified)
+
+def _load_local_idl() -> Optional["Idl"]:
+    """Parse the program IDL from disk, or return None if no local copy exists."""
+    env_path = os.environ.get("IDL_PATH")
+    for idl_path in ([Path(env_path)] if env_path else []) + IDL_SEARCH_PATHS:
+        if idl_path.exists():
+            with open(idl_path) as f:
+                return Idl.from_json(f.read())
+    return None
+
+
+def _b58encode(data: bytes) -> str:
+    """Base58-encode bytes (RPC memcmp filters take base58 strings)."""
+    num = int.from_bytes(data, "big")
+    encoded = ""
+    while num:
+        num, rem = divmod(num, 58)
+        encoded = _B58_ALPHABET[rem] + encoded
+    pad = len(data) - len(data.lstrip(b"\0"))
+    return "1" * pad + encoded
+
+
+def _document_type_filter(document_type: str) -> "MemcmpOpts":
+    """memcmp filter matching DocumentRecords whose document_type equals the given string."""
+    value = document_type.encode()
+    return MemcmpOpts(offset=DOCUMENT_TYPE_OFFSET, bytes=_b58encode(struct.pack("<I", len(value)) + value))
+
+
+def _rpc_filters(filters: list) -> list:
+    """Convert getProgramAccounts filters (dataSize ints / MemcmpOpts) to their JSON-RPC form."""
+    return [
+        {"dataSize": f} if isinstance(f, int) else {"memcmp": {"offset": f.offset, "bytes": f.bytes}}
+        for f in filters
+    ]
+
+
+def _account_bytes(data: list) -> bytes:
+    """Raw account bytes from a JSON-RPC `data` field ([payload, encoding])."""
+    payload, encoding = data
+    raw = base64.b64decode(payload)
+    if encoding == "base64+zstd":
+        # Frames from the node don't always record the content size, so stream-decompress
+        return zstandard.ZstdDecompressor().decompressobj().decompress(raw)
+    return raw
+
+
+@lru_cache(maxsize=PDA_CACHE_SIZE)
+def _pda_for_hash(program_id_bytes: bytes, hash_bytes: bytes) -> "Pubkey":
+    """Derive (and memoize) the DocumentRecord PDA for a document hash."""
+    pda, _ = Pubkey.find_program_address([b"document", hash_bytes], Pubkey.from_bytes(program_id_bytes))
+    return pda
+
+
+def _read_string(data: bytes, offset: int) -> Tuple[str, int]:
+    """Decode a Borsh string at offset; returns the string and the offset after it."""
+    (length,) = struct.unpack_from("<I", data, offset)
+    end = offset + 4 + length
+    return data[offset + 4:end].decode(), end
+
+
+def _decode_header(data: bytes) -> Tuple[bytes, str, Optional[str]]:
+    """
+    Decode hash, document_type and cats_number from a DocumentRecord prefix
+    (at least DOCUMENT_HEADER_LEN bytes; the remaining fields are not needed).
+    """
+    hash_bytes = data[8:DOCUMENT_TYPE_OFFSET]
+    document_type, offset = _read_string(data, DOCUMENT_TYPE_OFFSET)
+    cats_number = _read_string(data, offset + 1)[0] if data[offset] else None
+    return hash_bytes, document_type, cats_number
+
+
+def _has_document_type(data: bytes, document_type: Optional[str]) -> bool:
+    """
+    Whether a raw DocumentRecord (or its header) has the lowercased document_type.
+    None matches every record.
+    """
+    return document_type is None or _read_string(data, DOCUMENT_TYPE_OFFSET)[0].lower() == document_type
+
+
+def _matches_query(data: bytes, query: str) -> bool:
+    """
+    Whether a raw DocumentRecord's title or cats_number contains the lowercased query.
+    Reads only the strings it needs instead of decoding the whole account.
+    """
+    _, offset = _read_string(data, DOCUMENT_TYPE_OFFSET)
+    if data[offset]:
+        cats_number, offset = _read_string(data, offset + 1)
+        if query in cats_number.lower():
+            return True
+    else:
+        offset += 1
+    _, offset = _read_string(data, offset)  # ipfs_cid
+    title, _ = _read_string(data, offset)
+    return query in title.lower()
+
+
+def is_valid_cursor(cursor: str) -> bool:
+    """Whether a pagination cursor is a well-formed account address."""
+    if not HAS_SOLANA: return True
+    try:
+        Pubkey.from_string(cursor)
+    except ValueError:
+        return False
+    return True
+
+
+def _page_start(sorted_keys: list, page: int, limit: int, cursor: Optional[str]) -> int:
+    """Index of the first item on a page: just after the cursor key if given, else by page number."""
+    if cursor:
+        return bisect.bisect_right(sorted_keys, bytes(Pubkey.from_string(cursor)), key=bytes)
+    return (page - 1) * limit
+
+
+def _document_metadata(account, pubkey, data: Optional[bytes] = None) -> DocumentMetadata:
+    """
+    Build DocumentMetadata from a decoded DocumentRecord account.
+    Field types are already fixed by the IDL decoder, so validation is skipped.
+    Pass the raw account data when available: the hash is then hex-encoded
+    straight from it instead of from the decoder's list of ints.
+    """
+    return DocumentMetadata.model_construct(
+        hash=data[8:DOCUMENT_TYPE_OFFSET].hex() if data is not None else bytes(account.hash).hex(),
+        document_type=account.document_type,
+        cats_number=account.cats_number,
+        ipfs_cid=account.ipfs_cid,
+        title=account.title,
+        timestamp=account.timestamp,
+        page_number=account.page_number,
+        is_modified=account.is_modified,
+        modification_count=account.modification_count,
+        registrar=str(account.registrar),
+        account_pubkey=str(pubkey)
+    )
+
 class SolanaClient:
     """Client for interacting with the Truth Chain Solana program."""
     
     def __init__(self, network: str = "devnet"):
         self.network = network
         self.rpc_url = DEVNET_RPC if network == "devnet" else MAINNET_RPC
+        self.ws_url = DEVNET_WS if network == "devnet" else MAINNET_WS
         self.program: Optional[Program] = None
+        self._document_cache = TTLCache(maxsize=DOCUMENT_CACHE_SIZE, ttl=DOCUMENT_CACHE_TTL)
+        # Account address -> cached hash, so subscription updates can evict entries
+        # (flagged documents no longer store the hash their PDA was derived from)
+        self._cached_hashes = TTLCache(maxsize=DOCUMENT_CACHE_SIZE, ttl=DOCUMENT_CACHE_TTL)
+        self._document_bloom: Optional[BloomFilter] = None
+        # Accounts registered through this client or seen on the subscription,
+        # re-added to every rebuilt filter since a scan may not see them yet
+        self._recent_registrations = deque(maxlen=BLOOM_RECENT_KEYS)
+        self._program_lock = asyncio.Lock()
+        
+        # Registry stats and CATS index maintained incrementally by watch_registry()
+        self._records: Dict[bytes, RecordSummary] = {}
+        self._type_counts: Counter = Counter()
+        self._by_cats: Dict[str, Set[bytes]] = {}
+        self._modified_count = 0
+        self._stats_ready = False
+        # Failure message -> when its traceback was last logged
+        self._failures_logged: Dict[str, float] = {}
         
         if not HAS_SOLANA:
-            print("❌ ERROR: Solana libraries not installed. Run 'pip install solana solders anchorpy'")
+            logger.error("Solana libraries not installed. Run 'pip install solana solders anchorpy'")
             return
 
-        self.client = AsyncClient(self.rpc_url)
+        # Both clients live as long as this instance so connections (and TLS
+        # sessions) are kept alive between calls; release them with close()
+        self.client = AsyncClient(self.rpc_url, commitment=Processed, timeout=RPC_TIMEOUT)
+        # Raw HTTP client for JSON-RPC batch requests
+        self._http = httpx.AsyncClient(
+            timeout=RPC_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=RPC_MAX_CONNECTIONS,
+                max_keepalive_connections=RPC_MAX_KEEPALIVE,
+                keepalive_expiry=RPC_KEEPALIVE_EXPIRY
+            )
+        )
         self.program_id = Pubkey.from_string(PROGRAM_ID_STR)
+        self._registry_pda = self._find_registry_pda()
+        # Parsed up front so building the Program never waits on fetch_idl
+        self._idl: Optional[Idl] = _load_local_idl()
         
         # Load wallet
         wallet_path = os.environ.get("SOLANA_WALLET_PATH", os.path.expanduser("~/.config/solana/id.json"))
@@ -67,36 +326,78 @@ class SolanaClient:
             self.keypair = Keypair.from_bytes(bytes(secret))
         else:
             self.keypair = Keypair()
+        self.authority_pubkey = self.keypair.pubkey()
+    
+    async def close(self) -> None:
+        """Close the pooled RPC connections."""
+        if not HAS_SOLANA: return
+        await self.client.close()
+        await self._http.aclose()
     
     async def _get_program(self) -> Program:
+        # Fast path: steady state is a single attribute read
+        if self.program is not None:
+            return self.program
+        
         if not HAS_SOLANA:
             raise RuntimeError("Solana libraries (solders/anchorpy) are not installed.")
-            
-        if self.program is None:
-            # Try to load IDL from target directory
-            idl_path = Path(__file__).parent.parent.parent / "target" / "idl" / "truth_chain.json"
-            if idl_path.exists():
-                with open(idl_path) as f:
-                    idl = Idl.from_json(f.read())
-            else:
-                # Fetch from chain
-                idl = await Program.fetch_idl(self.program_id, self.client)
-            
-            wallet = Wallet(self.keypair)
-            provider = Provider(self.client, wallet)
-            self.program = Program(idl, self.program_id, provider)
+        
+        # Only one coroutine loads the IDL; the rest wait and reuse it
+        async with self._program_lock:
+            if self.program is None:
+                idl = self._idl
+                if idl is None:
+                    # No local IDL: fetch from chain
+                    idl = await Program.fetch_idl(self.program_id, self.client)
+                
+                wallet = Wallet(self.keypair)
+                provider = Provider(self.client, wallet, opts=TxOpts(skip_confirmation=False, preflight_commitment=Confirmed))
+                self.program = Program(idl, self.program_id, provider)
         
         return self.program
     
-    def _get_registry_pda(self) -> Pubkey:
+    async def warm_up(self) -> None:
+        """Build the Program ahead of the first request (fetching the IDL if there is no local copy)."""
+        if not HAS_SOLANA: return
+        await self._get_program()
+    
+    def _find_registry_pda(self) -> Pubkey:
         seeds = [b"registry"]
         pda, _ = Pubkey.find_program_address(seeds, self.program_id)
         return pda
     
+    def _get_registry_pda(self) -> Pubkey:
+        # Seeds are constant, so the address is derived once in __init__
+        return self._registry_pda
+    
     def _get_document_pda(self, hash_bytes: bytes) -> Pubkey:
-        seeds = [b"document", hash_bytes]
-        pda, _ = Pubkey.find_program_address(seeds, self.program_id)
-        return pda
+        return _pda_for_hash(bytes(self.program_id), bytes(hash_bytes))
+    
+    async def _rpc_batch(self, calls: List[Tuple[str, list]]) -> list:
+        """Send several JSON-RPC calls in one HTTP request; results are returned in call order."""
+        payload = [
+            {"jsonrpc": "2.0", "id": i, "method": method, "params": params}
+            for i, (method, params) in enumerate(calls)
+        ]
+        resp = await self._http.post(
+            self.rpc_url,
+            content=orjson.dumps(payload),
+            headers={"Content-Type": "application/json"}
+        )
+        resp.raise_for_status()
+        
+        replies = sorted(orjson.loads(resp.content), key=lambda r: r["id"])
+        for reply in replies:
+            if "error" in reply:
+                raise RuntimeError(f"RPC error: {reply['error']}")
+        return [reply["result"] for reply in replies]
+    
+    async def _scan_documents(self, filters: Optional[list] = None) -> List[Tuple[str, bytes]]:
+        """Full-data DocumentRecord scan; returns (pubkey, raw account bytes) pairs."""
+        (accounts,) = await self._rpc_batch([
+            ("getProgramAccounts", [str(self.program_id), {"encoding": ACCOUNT_ENCODING, "commitment": READ_COMMITMENT, "filters": _rpc_filters(filters or [DOCUMENT_RECORD_SIZE])}])
+        ])
+        return [(a["pubkey"], _account_bytes(a["account"]["data"])) for a in accounts]
     
     def get_solscan_url(self, pubkey: str) -> str:
         cluster = "" if self.network == "mainnet" else "?cluster=devnet"
@@ -105,63 +406,203 @@ class SolanaClient:
     async def get_document_by_hash(self, hash_bytes: bytes) -> Optional[DocumentMetadata]:
         if not HAS_SOLANA: return None
         
-        program = await self._get_program()
+        cached = self._document_cache.get(hash_bytes, MISSING)
+        if cached is not MISSING:
+            return cached
+        
         pda = self._get_document_pda(hash_bytes)
         
+        # A Bloom filter miss means the account definitely isn't registered, but only
+        # while the subscription is adding new accounts to it as they appear;
+        # otherwise the filter can lag the chain and the RPC has to be asked
+        if self._stats_ready and self._document_bloom is not None and bytes(pda) not in self._document_bloom:
+            return None
+        
+        document = await self._fetch_document(pda)
+        self._cache_document(hash_bytes, pda, document)
+        return document
+    
+    def _cache_document(self, hash_bytes: bytes, pda: Pubkey, document: Optional[DocumentMetadata]) -> None:
+        ttl = DOCUMENT_CACHE_TTL if document is not None else DOCUMENT_CACHE_NEGATIVE_TTL
+        self._document_cache.set(hash_bytes, document, ttl=ttl)
+        self._cached_hashes.set(bytes(pda), hash_bytes, ttl=ttl)
+    
+    def _invalidate_document(self, pda_bytes: bytes) -> None:
+        """Drop the cached lookup (hit or miss) for a document account that changed on chain."""
+        hash_bytes = self._cached_hashes.get(pda_bytes)
+        if hash_bytes is not None:
+            self._document_cache.pop(hash_bytes)
+            self._cached_hashes.pop(pda_bytes)
+    
+    def _log_failure(self, error: Exception, message: str, *args) -> None:
+        """Log a request-path failure without repeating the traceback on every request during an outage."""
+        now = time.monotonic()
+        last = self._failures_logged.get(message)
+        if last is None or now - last >= FAILURE_TRACEBACK_SECONDS:
+            self._failures_logged[message] = now
+            logger.exception(message, *args)
+        else:
+            logger.warning(message + ": %r", *args, error)
+    
+    async def _fetch_document(self, pda: Pubkey) -> Optional[DocumentMetadata]:
+        program = await self._get_program()
+        
         try:
             account = await program.account["DocumentRecord"].fetch(pda)
-            return DocumentMetadata(
-                hash=bytes(account.hash).hex(),
-                document_type=account.document_type,
-                cats_number=account.cats_number,
-                ipfs_cid=account.ipfs_cid,
-                title=account.title,
-                timestamp=account.timestamp,
-                page_number=account.page_number,
-                is_modified=account.is_modified,
-                modification_count=account.modification_count,
-                registrar=str(account.registrar),
-                account_pubkey=str(pda)
-            )
-        except:
+        except AccountDoesNotExistError:
             return None
+        # Any other failure propagates, so it's never cached as "not registered"
+        return _document_metadata(account, pda)
 
-    async def search_documents(self, page: int = 1, limit: int = 20, document_type: Optional[str] = None, search_query: Optional[str] = None) -> PaginatedResult:
+    async def _install_bloom(self, keys: List[bytes]) -> None:
+        """Replace the Bloom filter with one built from keys plus recently seen accounts."""
+        capacity = max(2 * len(keys), BLOOM_MIN_CAPACITY)
+        bloom = await asyncio.to_thread(BloomFilter.from_keys, keys, capacity, BLOOM_ERROR_RATE)
+        # Accounts seen while the filter was being built aren't in the scan
+        for key in self._recent_registrations:
+            bloom.add(key)
+        self._document_bloom = bloom
+    
+    def _remember_document_key(self, key: bytes) -> None:
+        """Record a newly created document account in the Bloom filter."""
+        self._recent_registrations.append(key)
+        if self._document_bloom is not None:
+            self._document_bloom.add(key)
+
+    async def get_documents_by_hashes(self, hashes: List[bytes]) -> List[DocumentMetadata]:
+        """
+        Fetch several documents at once; hashes that aren't registered are skipped.
+        
+        Cached documents are served from memory. The rest are fetched with
+        getMultipleAccounts, split at the RPC's per-call limit and issued concurrently.
+        """
+        if not HAS_SOLANA or not hashes: return []
+        
+        found = {}
+        misses = []
+        for h in hashes:
+            cached = self._document_cache.get(h, MISSING)
+            if cached is MISSING:
+                misses.append(h)
+            elif cached is not None:
+                found[h] = cached
+        
+        if misses:
+            program = await self._get_program()
+            pdas = [self._get_document_pda(h) for h in misses]
+            
+            # RPC failures propagate: a partial list would read as "not registered"
+            responses = await asyncio.gather(*(
+                self.client.get_multiple_accounts(pdas[i:i + MAX_MULTIPLE_ACCOUNTS], encoding="base64")
+                for i in range(0, len(pdas), MAX_MULTIPLE_ACCOUNTS)
+            ))
+            accounts = [account for resp in responses for account in resp.value]
+            
+            for h, pda, account in zip(misses, pdas, accounts):
+                document = _document_metadata(program.coder.accounts.decode(account.data), pda, account.data) if account is not None else None
+                self._cache_document(h, pda, document)
+                if document is not None:
+                    found[h] = document
+        
+        return [found[h] for h in hashes if h in found]
+
+    async def search_documents(self, page: int = 1, limit: int = 20, document_type: Optional[str] = None, search_query: Optional[str] = None, cursor: Optional[str] = None) -> PaginatedResult:
+        """
+        Page through DocumentRecords ordered by account address.
+        
+        Pass the previous page's next_cursor to continue from it; otherwise
+        the page number is used.
+        """
         if not HAS_SOLANA: return PaginatedResult(items=[], total=0)
         program = await self._get_program()
         try:
-            all_accounts = await program.account["DocumentRecord"].all()
-            if document_type:
-                all_accounts = [a for a in all_accounts if a.account.document_type.lower() == document_type.lower()]
+            # Let the RPC node drop non-matching types instead of shipping every record
+            # (one scan per stored spelling, since memcmp is case-sensitive)
+            filter_sets = [[DOCUMENT_RECORD_SIZE]]
+            type_match = None
+            if document_type and self._type_counts:
+                filter_sets = [
+                    [DOCUMENT_RECORD_SIZE, _document_type_filter(spelling)]
+                    for spelling in self._document_type_spellings(document_type)
+                ]
+            elif document_type:
+                # No stored spellings known yet (registry not seeded): scan
+                # unfiltered and compare the type case-insensitively here
+                type_match = document_type.lower()
+            
+            # Title search needs account data; otherwise only the keys (plus the
+            # header, when the type is compared here) are scanned and just the
+            # requested page is fetched
             if search_query:
-                query = search_query.lower()
-                all_accounts = [a for a in all_accounts if query in a.account.title.lower() or (a.account.cats_number and query in a.account.cats_number.lower())]
+                return await self._search_full_scan(program, filter_sets, page, limit, search_query, cursor, type_match)
             
-            total = len(all_accounts)
-            start = (page - 1) * limit
-            items = [DocumentMetadata(
-                hash=bytes(a.account.hash).hex(),
-                document_type=a.account.document_type,
-                cats_number=a.account.cats_number,
-                ipfs_cid=a.account.ipfs_cid,
-                title=a.account.title,
-                timestamp=a.account.timestamp,
-                page_number=a.account.page_number,
-                is_modified=a.account.is_modified,
-                modification_count=a.account.modification_count,
-                registrar=str(a.account.registrar),
-                account_pubkey=str(a.public_key)
-            ) for a in all_accounts[start:start+limit]]
-            return PaginatedResult(items=items, total=total)
-        except:
+            responses = await asyncio.gather(*(
+                self.client.get_program_accounts(
+                    self.program_id,
+                    encoding="base64",
+                    data_slice=DataSliceOpts(offset=0, length=DOCUMENT_HEADER_LEN if type_match else 0),
+                    filters=filters
+                )
+                for filters in filter_sets
+            ))
+            keys = sorted(
+                (a.pubkey for resp in responses for a in resp.value if _has_document_type(a.account.data, type_match)),
+                key=bytes
+            )
+            start = _page_start(keys, page, limit, cursor)
+            page_keys = keys[start:start+limit]
+            
+            accounts = (await self.client.get_multiple_accounts(page_keys, encoding="base64")).value if page_keys else []
+            items = [
+                _document_metadata(program.coder.accounts.decode(account.data), key, account.data)
+                for key, account in zip(page_keys, accounts)
+                if account is not None
+            ]
+            next_cursor = str(page_keys[-1]) if start + limit < len(keys) else None
+            return PaginatedResult(items=items, total=len(keys), next_cursor=next_cursor)
+        except Exception as e:
+            self._log_failure(e, "Document search failed")
             return PaginatedResult(items=[], total=0)
 
+    def _document_type_spellings(self, document_type: str) -> List[str]:
+        """
+        Spellings of a document type to filter on, matched case-insensitively
+        against the canonical DOCUMENT_TYPES and every type seen on chain.
+        """
+        wanted = document_type.lower()
+        spellings = {t for t in DOCUMENT_TYPES if t.lower() == wanted}
+        spellings.update(t for t in self._type_counts if t.lower() == wanted)
+        return sorted(spellings) or [document_type]
+
+    async def _search_full_scan(self, program: Program, filter_sets: List[list], page: int, limit: int, search_query: str, cursor: Optional[str], type_match: Optional[str] = None) -> PaginatedResult:
+        # One pass over the raw accounts: match, then order the matches by address.
+        # Only the accounts on the requested page are fully decoded.
+        query = search_query.lower()
+        scans = await asyncio.gather(*(self._scan_documents(filters) for filters in filter_sets))
+        matches = sorted(
+            (
+                (Pubkey.from_string(pubkey), data)
+                for scan in scans for pubkey, data in scan
+                if _has_document_type(data, type_match) and _matches_query(data, query)
+            ),
+            key=lambda a: bytes(a[0])
+        )
+        
+        total = len(matches)
+        start = _page_start([pubkey for pubkey, _ in matches], page, limit, cursor)
+        page_accounts = matches[start:start+limit]
+        items = [_document_metadata(program.coder.accounts.decode(data), pubkey, data) for pubkey, data in page_accounts]
+        next_cursor = str(page_accounts[-1][0]) if start + limit < total else None
+        return PaginatedResult(items=items, total=total, next_cursor=next_cursor)
+
     async def get_cats_record(self, cats_id: str) -> Optional[CATSRecord]:
         if not HAS_SOLANA: return None
-        program = await self._get_program()
         try:
-            all_accounts = await program.account["DocumentRecord"].all()
-            matching = [a for a in all_accounts if a.account.cats_number == cats_id]
+            if self._stats_ready:
+                # Answered from the subscription-maintained index
+                matching = [self._records[key].hash for key in self._by_cats.get(cats_id, ())]
+            else:
+                matching = await self._scan_cats(cats_id)
             if not matching: return None
             
             property_map = {"CATS-ZR": "Zorro Ranch", "CATS-LSJ": "Little St. James", "CATS-NYC": "New York"}
@@ -171,9 +612,24 @@ class SolanaClient:
                 cats_id=cats_id,
                 property_name=property_name,
                 document_count=len(matching),
-                document_hashes=[bytes(a.account.hash).hex() for a in matching]
+                document_hashes=[hash_bytes.hex() for hash_bytes in matching]
             )
-        except: return None
+        except Exception as e:
+            self._log_failure(e, "CATS lookup failed for %s", cats_id)
+            return None
+
+    async def _scan_cats(self, cats_id: str) -> List[bytes]:
+        """Hashes of the documents filed under a CATS number, found by scanning record headers."""
+        # cats_number follows the variable-length document_type, so it can't be memcmp'd;
+        # only the header prefix is transferred and decoded instead
+        resp = await self.client.get_program_accounts(
+            self.program_id,
+            encoding="base64",
+            data_slice=DataSliceOpts(offset=0, length=DOCUMENT_HEADER_LEN),
+            filters=[DOCUMENT_RECORD_SIZE]
+        )
+        headers = (_decode_header(a.account.data) for a in resp.value)
+        return [hash_bytes for hash_bytes, _, cats_number in headers if cats_number == cats_id]
 
     async def register_document(self, hash: bytes, document_type: str, cats_number: Optional[str], ipfs_cid: str, page_number: int, title: str) -> TransactionResult:
         program = await self._get_program()
@@ -185,26 +641,125 @@ class SolanaClient:
         ).accounts({
             "registry": registry_pda,
             "document": document_pda,
-            "authority": self.keypair.pubkey(),
-            "system_program": Pubkey.from_string("11111111111111111111111111111111")
+            "authority": self.authority_pubkey,
+            "system_program": SYSTEM_PROGRAM_ID
         }).rpc()
         
+        # Drop any cached "not found" for this hash
+        self._document_cache.pop(hash)
+        self._remember_document_key(bytes(document_pda))
+        
         return TransactionResult(signature=str(tx), document_pubkey=str(document_pda))
 
-    async def get_registry_stats(self) -> RegistryStats:
+    def _apply_record(self, key: bytes, summary: Optional[RecordSummary]) -> None:
+        """Replace one account's contribution to the stats counters."""
+        old = self._records.pop(key, None)
+        if old is not None:
+            self._type_counts[old.document_type] -= 1
+            if not self._type_counts[old.document_type]:
+                del self._type_counts[old.document_type]
+            if old.cats_number:
+                keys = self._by_cats[old.cats_number]
+                keys.discard(key)
+                if not keys:
+                    del self._by_cats[old.cats_number]
+            self._modified_count -= old.is_modified
+        
+        if summary is not None:
+            self._records[key] = summary
+            self._type_counts[summary.document_type] += 1
+            if summary.cats_number:
+                self._by_cats.setdefault(summary.cats_number, set()).add(key)
+            self._modified_count += summary.is_modified
+    
+    async def _seed_records(self, program: Program) -> None:
+        """Load every DocumentRecord into the stats counters and Bloom filter with one scan."""
+        document_accounts = await self._scan_documents()
+        self._records.clear()
+        self._type_counts.clear()
+        self._by_cats.clear()
+        self._modified_count = 0
+        for pubkey, data in document_accounts:
+            account = program.coder.accounts.decode(data)
+            self._apply_record(bytes(Pubkey.from_string(pubkey)), RecordSummary.from_account(account, data))
+        
+        # Covers accounts created while the subscription was down
+        await self._install_bloom(list(self._records))
+    
+    async def watch_registry(self) -> None:
+        """
+        Keep registry stats current from a programSubscribe stream.
+        Runs until cancelled, reconnecting whenever the stream drops.
+        """
+        if not HAS_SOLANA: return
+        
+        while True:
+            try:
+                # Inside the retry loop: if the IDL can't be loaded yet, try again later
+                program = await self._get_program()
+                async with ws_connect(self.ws_url) as ws:
+                    await ws.program_subscribe(self.program_id, commitment=Processed, encoding="base64", filters=[DOCUMENT_RECORD_SIZE])
+                    await ws.recv()  # subscription confirmation
+                    
+                    # Seed after subscribing: updates that land during the scan
+                    # are buffered and applied on top of it
+                    await self._seed_records(program)
+                    self._stats_ready = True
+                    
+                    async for msgs in ws:
+                        for msg in msgs:
+                            value = msg.result.value
+                            key, data = bytes(value.pubkey), value.account.data
+                            if key not in self._records:
+                                self._remember_document_key(key)
+                            self._apply_record(key, RecordSummary.from_account(program.coder.accounts.decode(data), data))
+                            self._invalidate_document(key)
+                        
+                        # Past its capacity the filter's false-positive rate climbs;
+                        # rebuild a larger one from the records already in memory
+                        if self._document_bloom is not None and len(self._records) > self._document_bloom.capacity:
+                            await self._install_bloom(list(self._records))
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning("Registry subscription dropped, reconnecting in %ds", WS_RECONNECT_SECONDS, exc_info=True)
+                self._stats_ready = False
+                await asyncio.sleep(WS_RECONNECT_SECONDS)
+    
+    async def get_registry_count(self) -> int:
+        """Number of registered documents, read from the Registry account alone."""
+        if not HAS_SOLANA: return 0
+        program = await self._get_program()
+        try:
+            registry = await program.account["Registry"].fetch(self._get_registry_pda())
+        except AccountDoesNotExistError:
+            return 0
+        return registry.document_count
+    
+    async def get_full_stats(self) -> RegistryStats:
+        """Document count plus the modified/CATS/type breakdown over every DocumentRecord."""
         if not HAS_SOLANA: return RegistryStats(0,0,0,{})
+        
+        # Served from the live counters while the subscription is healthy
+        if self._stats_ready:
+            return RegistryStats(len(self._records), self._modified_count, len(self._by_cats), dict(self._type_counts))
+        
         program = await self._get_program()
         try:
-            registry_pda = self._get_registry_pda()
-            registry = await program.account["Registry"].fetch(registry_pda)
-            all_accounts = await program.account["DocumentRecord"].all()
-            
-            modified_count = sum(1 for a in all_accounts if a.account.is_modified)
-            cats_set = set(a.account.cats_number for a in all_accounts if a.account.cats_number)
+            # Registry and document scan are independent: fetch both in one round trip
+            registry_info, document_accounts = await self._rpc_batch([
+                ("getAccountInfo", [str(self._get_registry_pda()), {"encoding": "base64", "commitment": READ_COMMITMENT}]),
+                ("getProgramAccounts", [str(self.program_id), {"encoding": ACCOUNT_ENCODING, "commitment": READ_COMMITMENT, "filters": _rpc_filters([DOCUMENT_RECORD_SIZE])}])
+            ])
+            registry = program.coder.accounts.decode(base64.b64decode(registry_info["value"]["data"][0]))
+            records = [program.coder.accounts.decode(_account_bytes(a["account"]["data"])) for a in document_accounts]
             
-            dt_map = {}
-            for a in all_accounts:
-                dt_map[a.account.document_type] = dt_map.get(a.account.document_type, 0) + 1
+            # Pull each field into its own list once; counting then runs in C
+            document_types = [r.document_type for r in records]
+            modified_flags = [r.is_modified for r in records]
+            cats_numbers = {r.cats_number for r in records if r.cats_number}
                 
-            return RegistryStats(registry.document_count, modified_count, len(cats_set), dt_map)
-        except: return RegistryStats(0,0,0,{})
+            return RegistryStats(registry.document_count, modified_flags.count(True), len(cats_numbers), dict(Counter(document_types)))
+        except Exception as e:
+            self._log_failure(e, "Registry stats scan failed")
+            return RegistryStats(0,0,0,{})